@@ -0,0 +1,43 @@
+"""Store API key hash as raw digest
+
+Revision ID: 3c9a1f7e52b4
+Revises: f883904edd40
+Create Date: 2026-10-15 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a1f7e52b4'
+down_revision: Union[str, Sequence[str], None] = 'f883904edd40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing hex digests are decoded in place so issued API keys keep working
+    op.alter_column(
+        'api_keys',
+        'key_hash',
+        existing_type=sa.Text(),
+        type_=sa.LargeBinary(length=32),
+        existing_nullable=False,
+        postgresql_using="decode(key_hash, 'hex')",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'api_keys',
+        'key_hash',
+        existing_type=sa.LargeBinary(length=32),
+        type_=sa.Text(),
+        existing_nullable=False,
+        postgresql_using="encode(key_hash, 'hex')",
+    )
@@ -19,7 +19,7 @@ from app.settings import settings
 security = HTTPBearer(auto_error=False)
 
 
-def hash_api_key(api_key: str) -> str:
+def hash_api_key(api_key: str) -> bytes:
     """
     Hash API key with pepper using SHA-256.
     
@@ -27,9 +27,9 @@ def hash_api_key(api_key: str) -> str:
         api_key: Raw API key
         
     Returns:
-        str: Hashed API key
+        bytes: Raw 32-byte digest of the API key
     """
-    return hashlib.sha256(f"{api_key}{settings.api_key_pepper}".encode()).hexdigest()
+    return hashlib.sha256(f"{api_key}{settings.api_key_pepper}".encode()).digest()
 
 
 def get_current_owner_id(
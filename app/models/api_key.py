@@ -5,7 +5,7 @@ API key database model.
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
-from sqlalchemy import Column, DateTime, String, Text, ForeignKey
+from sqlalchemy import Column, DateTime, LargeBinary, String, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from sqlalchemy.orm import relationship
 
@@ -24,8 +24,8 @@ class APIKey(Base, TimestampMixin):
     # Owner scoping
     owner_id = Column(PostgresUUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     
-    # Hashed API key
-    key_hash = Column(Text, nullable=False, unique=True)
+    # Hashed API key (raw SHA-256 digest)
+    key_hash = Column(LargeBinary(32), nullable=False, unique=True)
     
     # Relationships
     owner = relationship("User", back_populates="api_keys")
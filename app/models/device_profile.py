@@ -68,6 +68,11 @@ class DeviceProfile(Base, TimestampMixin, SoftDeleteMixin):
         """String representation of the model."""
         return f"<DeviceProfile(id={self.id}, name={self.name}, owner_id={self.owner_id})>"
     
+    @property
+    def etag(self) -> str:
+        """Weak entity tag derived from the current version."""
+        return f'W/"{self.version}"'
+    
     def increment_version(self) -> None:
         """Increment the version number."""
         self.version += 1
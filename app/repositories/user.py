@@ -3,16 +3,15 @@ User repository for data access operations.
 """
 
 import secrets
-import hashlib
 from typing import List, Optional
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.auth import hash_api_key
 from app.models.user import User
 from app.models.api_key import APIKey
-from app.settings import settings
 
 
 class UserRepository:
@@ -101,7 +100,7 @@ class UserRepository:
         raw_key = secrets.token_urlsafe(32)
         
         # Hash the key with pepper
-        key_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).hexdigest()
+        key_hash = hash_api_key(raw_key)
         
         # Create API key record
         api_key = APIKey(
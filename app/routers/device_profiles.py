@@ -6,7 +6,6 @@ from typing import List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from fastapi.responses import JSONResponse
 from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.orm import Session
@@ -19,10 +18,35 @@ from app.schemas.device_profile import (
     DeviceProfileResponse,
     DeviceProfileUpdate
 )
+from app.utils.request_body import json_body, json_body_openapi
 
 router = APIRouter()
 
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag.
+    
+    Uses the weak comparison required for If-None-Match, so ``W/`` prefixes
+    are ignored on both sides.
+    
+    Args:
+        if_none_match: Raw If-None-Match header value (``*`` or a list of tags)
+        etag: Current entity tag of the resource
+        
+    Returns:
+        bool: True if the client's cached representation is still current
+    """
+    if if_none_match.strip() == "*":
+        return True
+    
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
 @router.get("/device-profiles", response_model=Page[DeviceProfileResponse])
 async def list_device_profiles(
     params: Params = Depends(),
@@ -43,12 +67,17 @@ async def list_device_profiles(
     )
 
 
-@router.post("/device-profiles", response_model=DeviceProfileResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/device-profiles",
+    response_model=DeviceProfileResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=json_body_openapi(DeviceProfileCreate),
+)
 async def create_device_profile(
-    profile_data: DeviceProfileCreate,
     request: Request,
     owner_id: UUID = Depends(get_current_owner_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    profile_data: DeviceProfileCreate = Depends(json_body(DeviceProfileCreate))
 ):
     """Create a new device profile."""
     repository = DeviceProfileRepository(db)
@@ -65,10 +94,12 @@ async def create_device_profile(
     # Generate Location header using url_for
     location_url = request.url_for("get_device_profile", profile_id=profile.id)
     
-    response_data = DeviceProfileResponse.model_validate(profile).model_dump(mode='json')
-    response = JSONResponse(content=response_data, status_code=status.HTTP_201_CREATED)
-    response.headers["Location"] = str(location_url)
-    response.headers["ETag"] = f'W/"{profile.version}"'
+    response = Response(
+        content=DeviceProfileResponse.model_validate(profile).model_dump_json(),
+        media_type="application/json",
+        status_code=status.HTTP_201_CREATED,
+        headers={"Location": str(location_url), "ETag": profile.etag}
+    )
     
     return response
 
@@ -76,6 +107,7 @@ async def create_device_profile(
 @router.get("/device-profiles/{profile_id}", response_model=DeviceProfileResponse)
 async def get_device_profile(
     profile_id: UUID,
+    request: Request,
     owner_id: UUID = Depends(get_current_owner_id),
     db: Session = Depends(get_db)
 ):
@@ -89,20 +121,31 @@ async def get_device_profile(
             detail="Device profile not found"
         )
     
-    response_data = DeviceProfileResponse.model_validate(profile).model_dump(mode='json')
-    response = JSONResponse(content=response_data)
-    response.headers["ETag"] = f'W/"{profile.version}"'
+    # Short-circuit conditional GETs before serializing the body
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag_matches(if_none_match, profile.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": profile.etag})
+    
+    response = Response(
+        content=DeviceProfileResponse.model_validate(profile).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": profile.etag}
+    )
     
     return response
 
 
-@router.patch("/device-profiles/{profile_id}", response_model=DeviceProfileResponse)
+@router.patch(
+    "/device-profiles/{profile_id}",
+    response_model=DeviceProfileResponse,
+    openapi_extra=json_body_openapi(DeviceProfileUpdate),
+)
 async def update_device_profile(
     profile_id: UUID,
-    profile_data: DeviceProfileUpdate,
     request: Request,
     owner_id: UUID = Depends(get_current_owner_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    profile_data: DeviceProfileUpdate = Depends(json_body(DeviceProfileUpdate))
 ):
     """Update a device profile."""
     # Check for If-Match header
@@ -147,9 +190,11 @@ async def update_device_profile(
                 detail=f"Version mismatch. Current version: {existing_profile.version}"
             )
     
-    response_data = DeviceProfileResponse.model_validate(profile).model_dump(mode='json')
-    response = JSONResponse(content=response_data)
-    response.headers["ETag"] = f'W/"{profile.version}"'
+    response = Response(
+        content=DeviceProfileResponse.model_validate(profile).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": profile.etag}
+    )
     
     return response
 
@@ -58,12 +58,8 @@ class TemplateNormalizer:
                     # Simple field rename
                     normalized[new_field] = normalized.pop(old_field)
         
-        # Apply defaults for missing fields
-        for field, default_value in self.defaults.items():
-            if field not in normalized:
-                normalized[field] = default_value
-        
-        return normalized
+        # Apply defaults for missing fields in a single merge (payload values win)
+        return {**self.defaults, **normalized}
     
     def add_field_mapping(self, old_field: str, new_field: str | Callable) -> None:
         """
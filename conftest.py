@@ -2,137 +2,301 @@
 Pytest configuration and shared fixtures.
 """
 
+import hashlib
+import os
+from pathlib import Path
+from types import MappingProxyType
+
 import pytest
+import pytest_asyncio
+from alembic.config import Config
+from alembic.script import ScriptDirectory
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Engine, create_engine, event, insert, inspect
+from sqlalchemy.orm import Session
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 from app.main import app
 from app.db import Base, get_db
 from app.models.user import User
-from app.models.api_key import APIKey
 from app.models.device_profile import DeviceProfile
 from app.models.template import Template
 from app.repositories.user import UserRepository
+from tests.helpers import BASE_PROFILE, create_api_key_for
+
+
+# Let pytest rewrite asserts in shared helpers for detailed failure messages
+pytest.register_assert_rewrite("tests._assertions")
+
+
+# Test database setup - in-memory SQLite by default; --reuse-db needs the
+# schema to outlive the run, so it uses one database file per pytest-xdist worker
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+IN_MEMORY_DATABASE_URL = "sqlite://"
+REUSE_DB_DATABASE_URL = f"sqlite:///./test_{XDIST_WORKER}.db"
+
+
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    """Stop pysqlite from managing transactions so SAVEPOINTs behave."""
+    dbapi_connection.isolation_level = None
+
+
+def _disable_durability(dbapi_connection, connection_record):
+    """Keep the journal in memory and skip fsync; test data is disposable."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.close()
+
 
+def _emit_begin(conn):
+    """Emit BEGIN ourselves now that pysqlite no longer does."""
+    conn.exec_driver_sql("BEGIN")
 
-# Test database setup - SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def create_test_engine(url: str) -> Engine:
+    """
+    Create a single-connection SQLite engine for the test session.
+    
+    StaticPool hands out the same connection every time, which keeps an
+    in-memory database alive for the whole session.
+    
+    Args:
+        url: SQLite database URL
+        
+    Returns:
+        Engine: Engine with working SAVEPOINT support
+    """
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    event.listen(engine, "connect", _disable_pysqlite_transactions)
+    event.listen(engine, "connect", _disable_durability)
+    event.listen(engine, "begin", _emit_begin)
+    return engine
+
+
+# Fingerprint of the schema the test database was last built with (--reuse-db)
+PROJECT_ROOT = Path(__file__).parent
+REUSE_DB_HASH_FILE = PROJECT_ROOT / f".pytest_reuse_db_hash_{XDIST_WORKER}"
+
+# Raw API key seeded by the test_api_key fixture and the matching headers,
+# built once and shared read-only by every test
+TEST_API_KEY = "test-api-key-12345"
+OTHER_USER_API_KEY = "other-user-key-12345"
+AUTHENTICATED_HEADERS = MappingProxyType({"Authorization": f"Bearer {TEST_API_KEY}"})
+
+
+def pytest_addoption(parser):
+    """Register test database lifecycle options."""
+    group = parser.getgroup("database")
+    group.addoption(
+        "--reuse-db",
+        action="store_true",
+        default=False,
+        help="Keep the test database schema between runs while models and migrations are unchanged.",
+    )
+    group.addoption(
+        "--create-db",
+        action="store_true",
+        default=False,
+        help="Recreate the test database schema even when --reuse-db would keep it.",
+    )
+
+
+def schema_fingerprint(engine: Engine) -> str:
+    """
+    Compute a fingerprint of the schema the test database should have.
+    
+    Args:
+        engine: Engine the DDL is compiled for
+        
+    Returns:
+        str: SHA-256 over the models' DDL and the Alembic head revision
+    """
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(engine)))
+        statements.extend(str(CreateIndex(index).compile(engine)) for index in table.indexes)
+    
+    alembic_config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    head = ScriptDirectory.from_config(alembic_config).get_current_head() or ""
+    
+    return hashlib.sha256("\n".join([*statements, head]).encode()).hexdigest()
+
+
+def schema_is_reusable(engine: Engine, fingerprint: str) -> bool:
+    """Check that the existing test database was built from the current schema."""
+    if not REUSE_DB_HASH_FILE.exists() or REUSE_DB_HASH_FILE.read_text() != fingerprint:
+        return False
+    return set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+
+
+@pytest.fixture(scope="session")
+def engine(request):
+    """Create the test database engine, in memory unless --reuse-db is given."""
+    url = REUSE_DB_DATABASE_URL if request.config.getoption("--reuse-db") else IN_MEMORY_DATABASE_URL
+    engine = create_test_engine(url)
+    
+    yield engine
+    
+    engine.dispose()
 
 
 @pytest.fixture(scope="session", autouse=True)
-def setup_test_db():
-    """Set up the test database before running tests."""
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-    yield
-    # Clean up after all tests
-    Base.metadata.drop_all(bind=engine)
+def setup_test_db(request, engine):
+    """
+    Set up the test database before running tests.
+    
+    By default the schema is built in memory for every run and discarded with it.
+    With --reuse-db it is kept between runs and only rebuilt when the models
+    or Alembic migrations change (or when --create-db is given). Tests never
+    commit their rows, so a reused database is always empty.
+    """
+    if not request.config.getoption("--reuse-db"):
+        # A fresh in-memory database; it goes away with the engine
+        Base.metadata.create_all(bind=engine)
+        return
+    
+    fingerprint = schema_fingerprint(engine)
+    
+    if request.config.getoption("--create-db") or not schema_is_reusable(engine, fingerprint):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        REUSE_DB_HASH_FILE.write_text(fingerprint)
+
+
+@pytest.fixture(scope="session")
+def connection(engine, setup_test_db):
+    """Open a single connection whose outer transaction is never committed."""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        yield connection
+        transaction.rollback()
 
 
 @pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    # Clean up all data before each test using a separate connection
-    try:
-        with engine.connect() as cleanup_conn:
-            cleanup_conn.execute(text("DELETE FROM api_keys"))
-            cleanup_conn.execute(text("DELETE FROM profiles"))
-            cleanup_conn.execute(text("DELETE FROM templates"))
-            cleanup_conn.execute(text("DELETE FROM users"))
-            cleanup_conn.commit()
-    except Exception:
-        pass  # Ignore cleanup errors
-    
-    # Create fresh session for test
-    session = TestingSessionLocal()
+def db_session(connection):
+    """
+    Create a database session isolated in a SAVEPOINT for each test.
+    
+    Commits made by the test (or by the app through the overridden get_db)
+    only release savepoints nested inside the test's own SAVEPOINT, which is
+    rolled back afterwards, so every test starts from the same state.
+    """
+    nested = connection.begin_nested()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
     
     try:
         yield session
     finally:
         session.close()
+        nested.rollback()
+
+
+@pytest.fixture(scope="session")
+def http_client():
+    """Create one test client, and run the app's lifespan once, for the whole session."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
-    """Create a test client with database dependency override."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+def client(http_client, db_session):
+    """Provide the shared test client with database dependency override."""
+    app.dependency_overrides[get_db] = lambda: db_session
     
-    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield http_client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_http_client():
+    """Create one ASGI-backed async HTTP client shared by the whole session."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http_client:
+        yield http_client
+
+
+@pytest.fixture(scope="function")
+def async_client(async_http_client, db_session):
+    """Provide the shared async client with database dependency override."""
+    app.dependency_overrides[get_db] = lambda: db_session
     
     try:
-        with TestClient(app) as test_client:
-            yield test_client
+        yield async_http_client
     finally:
         app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def test_user(db_session):
-    """Create a test user."""
+@pytest.fixture(scope="session")
+def seed_session(connection):
+    """
+    Create a session for rows shared by every test.
+    
+    Its commits only release SAVEPOINTs, so the rows live in the connection's
+    outer transaction: visible to every test, never rolled back by them, and
+    discarded at the end of the run. The seeding fixtures are autouse so they
+    always run before any test or class opens its own SAVEPOINT.
+    """
+    session = Session(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+    
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_user(seed_session):
+    """Create a test user shared by every test."""
     user = User(
         email="test@example.com"
     )
-    db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    seed_session.add(user)
+    seed_session.commit()
+    seed_session.refresh(user)
     return user
 
 
-@pytest.fixture
-def test_api_key(test_user, db_session):
-    """Create a test API key for the test user."""
-    import hashlib
-    from app.settings import settings
-    
-    # Generate raw key
-    raw_key = "test-api-key-12345"
-    key_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).hexdigest()
-    
-    api_key = APIKey(
-        owner_id=test_user.id,
-        key_hash=key_hash
-    )
-    db_session.add(api_key)
-    db_session.commit()
-    db_session.refresh(api_key)
+@pytest.fixture(scope="session", autouse=True)
+def test_api_key(test_user, seed_session):
+    """Create a test API key for the test user, shared by every test."""
+    raw_key = TEST_API_KEY
+    api_key = create_api_key_for(seed_session, test_user, raw_key)
     
     return api_key, raw_key
 
 
-@pytest.fixture
+@pytest.fixture(scope="session", autouse=True)
+def other_api_key(seed_session):
+    """Create a second user with its own API key, shared by every test."""
+    other_user = User(email="other@example.com")
+    seed_session.add(other_user)
+    # Flush for the user's ID; the API key's commit persists both rows
+    seed_session.flush()
+    
+    raw_key = OTHER_USER_API_KEY
+    api_key = create_api_key_for(seed_session, other_user, raw_key)
+    
+    return api_key, raw_key
+
+
+@pytest.fixture(scope="session")
 def authenticated_headers(test_api_key):
-    """Get authentication headers for API requests."""
-    _, raw_key = test_api_key
-    return {"Authorization": f"Bearer {raw_key}"}
+    """Get authentication headers for API requests (read-only mapping)."""
+    return AUTHENTICATED_HEADERS
 
 
 @pytest.fixture
 def sample_device_profile_data():
     """Sample device profile data for testing."""
-    return {
-        "name": "Test Profile",
-        "device_type": "desktop",
-        "window_width": 1920,
-        "window_height": 1080,
-        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "country": "us",
-        "custom_headers": [
-            {"name": "Accept-Language", "value": "en-US,en;q=0.9"}
-        ],
-        "extras": {}
-    }
+    return dict(BASE_PROFILE)
 
 
 @pytest.fixture
@@ -161,11 +325,11 @@ def test_template(db_session):
     return template
 
 
-@pytest.fixture
-def test_templates(db_session):
-    """Create multiple test templates."""
-    templates = [
-        Template(
+@pytest.fixture(scope="session")
+def template_payloads():
+    """Template rows shared by every test that seeds templates."""
+    return (
+        dict(
             name="Chrome Desktop (Latest)",
             description="Latest Chrome browser on Windows desktop",
             version="Chrome 120",
@@ -188,7 +352,7 @@ def test_templates(db_session):
                 }
             }
         ),
-        Template(
+        dict(
             name="Safari Mobile (iOS 17)",
             description="Safari browser on iPhone with iOS 17",
             version="iOS 17",
@@ -212,7 +376,7 @@ def test_templates(db_session):
                 }
             }
         ),
-        Template(
+        dict(
             name="Firefox Desktop (Latest)",
             description="Latest Firefox browser on Linux desktop",
             version="Firefox 121",
@@ -235,13 +399,13 @@ def test_templates(db_session):
                 }
             }
         )
-    ]
-    
-    for template in templates:
-        db_session.add(template)
+    )
+
+
+@pytest.fixture
+def test_templates(db_session, template_payloads):
+    """Create multiple test templates with a single bulk insert."""
+    templates = list(db_session.scalars(insert(Template).returning(Template), list(template_payloads)))
     db_session.commit()
     
-    for template in templates:
-        db_session.refresh(template)
-    
     return templates
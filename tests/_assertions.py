@@ -0,0 +1,51 @@
+"""
+Shared assertions for API responses.
+"""
+
+from typing import Union
+from uuid import UUID
+
+from fastapi import status
+from httpx import Response
+
+from tests.helpers import loads
+
+
+def assert_etag(response: Response, version: int) -> None:
+    """
+    Assert that a response carries the weak ETag of a resource version.
+
+    Args:
+        response: Response to check
+        version: Expected resource version
+    """
+    assert response.headers.get("ETag") == f'W/"{version}"'
+
+
+def assert_location(response: Response, resource_id: Union[str, UUID]) -> None:
+    """
+    Assert that a response's Location header points at a resource.
+
+    Args:
+        response: Response to check
+        resource_id: ID the Location URL must end with
+    """
+    location = response.headers.get("Location")
+    assert location and location.endswith(f"/{resource_id}"), f"Unexpected Location header: {location}"
+
+
+def assert_validation_error_on(response: Response, *fields: str) -> None:
+    """
+    Assert that a response is a 422 problem with a validation error on each field.
+
+    Args:
+        response: Response to check
+        fields: Field names that must appear in the location of some error
+    """
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    errors = loads(response)["errors"]
+    assert isinstance(errors, list) and errors
+
+    for field in fields:
+        assert any(field in error.get("loc", ()) for error in errors), \
+            f"Expected {field} to have validation error, but errors were: {errors}"
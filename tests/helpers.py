@@ -0,0 +1,121 @@
+"""
+Shared helpers for seeding test data and reading responses.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List
+from uuid import UUID, uuid4
+
+import orjson
+from httpx import Response
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.auth import hash_api_key
+from app.models.api_key import APIKey
+from app.models.device_profile import DeviceProfile
+from app.models.user import User
+from app.schemas.device_profile import DeviceProfileCreate
+
+
+class _FrozenDict(dict):
+    """Read-only dict that still serializes as a plain JSON object."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("shared test payloads are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn JSON objects into read-only dicts and arrays into tuples."""
+    if isinstance(value, dict):
+        return _FrozenDict({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Valid create payload shared read-only by every test, nested values included;
+# build variants with {**BASE_PROFILE, "field": value} instead of copying and mutating
+BASE_PROFILE = _freeze({
+    "name": "Test Profile",
+    "device_type": "desktop",
+    "window_width": 1920,
+    "window_height": 1080,
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "country": "us",
+    "custom_headers": [
+        {"name": "Accept-Language", "value": "en-US,en;q=0.9"},
+    ],
+    "extras": {},
+})
+
+# BASE_PROFILE validated once per session and serialized the way the API
+# echoes it, for tests that post the base profile unchanged
+BASE_PROFILE_BODY = DeviceProfileCreate.model_validate(BASE_PROFILE).model_dump_json().encode()
+
+# Test keys are reused across tests and the pepper is fixed for the run, so
+# each key only needs hashing once
+_hash_api_key = lru_cache(maxsize=None)(hash_api_key)
+
+
+def seed_profiles(db: Session, owner_id: UUID, payloads: Iterable[Dict[str, Any]]) -> List[UUID]:
+    """
+    Insert device profiles directly, bypassing the HTTP layer.
+
+    Payloads are validated with the same schema as the create endpoint and
+    inserted with a single executemany, then committed once.
+
+    Args:
+        db: Database session
+        owner_id: Owner of the seeded profiles
+        payloads: Profile payloads, shaped like the create endpoint's body
+
+    Returns:
+        List[UUID]: IDs of the seeded profiles, in payload order
+    """
+    rows = [
+        {"id": uuid4(), "owner_id": owner_id, **DeviceProfileCreate.model_validate(payload).model_dump()}
+        for payload in payloads
+    ]
+
+    db.execute(insert(DeviceProfile), rows)
+    db.commit()
+
+    return [row["id"] for row in rows]
+
+
+def create_api_key_for(db: Session, user: User, raw_key: str) -> APIKey:
+    """
+    Issue an API key for a user, hashed the same way the app verifies it.
+
+    Args:
+        db: Database session
+        user: Owner of the API key
+        raw_key: Plain API key sent as the Bearer token
+
+    Returns:
+        APIKey: The committed API key
+    """
+    api_key = APIKey(owner_id=user.id, key_hash=_hash_api_key(raw_key))
+    db.add(api_key)
+    db.commit()
+    db.refresh(api_key)
+
+    return api_key
+
+
+def loads(response: Response) -> Any:
+    """
+    Decode a JSON response body with orjson.
+
+    Args:
+        response: Response with a JSON body
+
+    Returns:
+        Any: Decoded JSON document
+    """
+    return orjson.loads(response.content)
@@ -2,12 +2,16 @@
 Authentication tests for API key validation.
 """
 
+import hashlib
+
 import pytest
 from fastapi import status
 from sqlalchemy.orm import Session
 
 from app.models.api_key import APIKey
 from app.models.user import User
+from app.settings import settings
+from tests.helpers import create_api_key_for
 
 
 class TestAPIAuthentication:
@@ -162,20 +166,9 @@ class TestAPIAuthentication:
 
     def test_deleted_api_key(self, client, db_session, test_user, sample_device_profile_data):
         """Test that deleted API keys are rejected."""
-        import hashlib
-        from app.settings import settings
-        
         # Create an API key
         raw_key = "test-deleted-key-12345"
-        key_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).hexdigest()
-        
-        api_key = APIKey(
-            owner_id=test_user.id,
-            key_hash=key_hash
-        )
-        db_session.add(api_key)
-        db_session.commit()
-        db_session.refresh(api_key)
+        api_key = create_api_key_for(db_session, test_user, raw_key)
         
         # Verify it works initially
         response = client.post(
@@ -202,28 +195,17 @@ class TestAPIAuthentication:
 
     def test_inactive_user_api_key(self, client, db_session, sample_device_profile_data):
         """Test that API keys for inactive users are rejected."""
-        import hashlib
-        from app.settings import settings
-        
         # Create an inactive user
         user = User(
             email="inactive@example.com",
             is_active=False
         )
         db_session.add(user)
-        db_session.commit()
-        db_session.refresh(user)
+        db_session.flush()
         
-        # Create API key for inactive user
+        # Create API key for inactive user (committing both rows)
         raw_key = "test-inactive-user-key-12345"
-        key_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).hexdigest()
-        
-        api_key = APIKey(
-            owner_id=user.id,
-            key_hash=key_hash
-        )
-        db_session.add(api_key)
-        db_session.commit()
+        create_api_key_for(db_session, user, raw_key)
         
         # The API key should still work (we don't check user.is_active in auth)
         # This is by design - API keys are the primary authentication mechanism
@@ -238,12 +220,9 @@ class TestAPIAuthentication:
 
     def test_api_key_hash_verification(self, client, db_session, test_user, sample_device_profile_data):
         """Test that API key hashing works correctly."""
-        import hashlib
-        from app.settings import settings
-        
         # Create API key with known hash
         raw_key = "test-hash-verification-key-12345"
-        expected_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).hexdigest()
+        expected_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).digest()
         
         api_key = APIKey(
             owner_id=test_user.id,
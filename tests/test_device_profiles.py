@@ -2,26 +2,60 @@
 Device Profile CRUD tests.
 """
 
+import itertools
+from types import MappingProxyType, SimpleNamespace
+
+import orjson
 import pytest
 from fastapi import status
+from hypothesis import HealthCheck, example, given, settings, strategies as st
 from sqlalchemy.orm import Session
 
 from app.models.device_profile import DeviceProfile
+from tests._assertions import assert_etag, assert_location, assert_validation_error_on
+from tests.helpers import BASE_PROFILE, BASE_PROFILE_BODY, loads, seed_profiles
+
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+# Well-formed profile ID that is never seeded
+NONEXISTENT_PROFILE_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+# Deterministic suffixes for profile names that must be unique
+_profile_name_seq = itertools.count(1)
+
+# Arbitrary custom headers; the X- prefix keeps names clear of forbidden headers
+CUSTOM_HEADERS = st.fixed_dictionaries({
+    "name": st.from_regex(r"X-[A-Za-z0-9-]{1,14}", fullmatch=True),
+    "value": st.text(max_size=32),
+})
+
+
+@pytest.fixture
+def created_profile(db_session, test_user, sample_device_profile_data):
+    """Seed a device profile for the test user and return its ID, ETag and payload."""
+    [profile_id] = seed_profiles(db_session, test_user.id, [sample_device_profile_data])
+    return SimpleNamespace(id=str(profile_id), etag='W/"1"', data=sample_device_profile_data)
+
+
+@pytest.fixture(scope="session")
+def json_headers(authenticated_headers):
+    """Authenticated headers for requests sending pre-serialized JSON bodies."""
+    return MappingProxyType({**authenticated_headers, "Content-Type": "application/json"})
 
 
 class TestDeviceProfileCRUD:
     """Test device profile CRUD operations."""
 
-    def test_create_device_profile_success(self, client, authenticated_headers, sample_device_profile_data):
+    async def test_create_device_profile_success(self, async_client, json_headers, sample_device_profile_data):
         """Test creating a device profile with valid data."""
-        response = client.post(
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
+            content=BASE_PROFILE_BODY,
+            headers=json_headers
         )
         
         assert response.status_code == status.HTTP_201_CREATED
-        data = response.json()
+        data = loads(response)
         
         # Verify response structure
         assert "id" in data
@@ -43,58 +77,20 @@ class TestDeviceProfileCRUD:
         assert "updated_at" in data
         
         # Verify Location header
-        assert "Location" in response.headers
-        assert f"/api/v1/device-profiles/{data['id']}" in response.headers["Location"]
-
-    def test_get_device_profile_success(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
-        """Test retrieving an existing device profile."""
-        # Create a profile first
-        create_response = client.post(
-            "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
-        )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
-        
-        # Get the profile
-        response = client.get(
-            f"/api/v1/device-profiles/{profile_id}",
-            headers=authenticated_headers
-        )
-        
-        assert response.status_code == status.HTTP_200_OK
-        data = response.json()
-        
-        assert data["id"] == profile_id
-        assert data["name"] == sample_device_profile_data["name"]
-        assert "ETag" in response.headers
-        assert response.headers["ETag"] == 'W/"1"'
+        assert_location(response, data["id"])
 
-    def test_get_device_profile_not_found(self, client, authenticated_headers):
+    async def test_get_device_profile_not_found(self, async_client, authenticated_headers):
         """Test retrieving a non-existent device profile."""
-        fake_id = "123e4567-e89b-12d3-a456-426614174000"
-        
-        response = client.get(
-            f"/api/v1/device-profiles/{fake_id}",
+        response = await async_client.get(
+            f"/api/v1/device-profiles/{NONEXISTENT_PROFILE_ID}",
             headers=authenticated_headers
         )
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        assert "not found" in response.json()["detail"].lower()
+        assert loads(response)["detail"] == "Device profile not found"
 
-    def test_update_device_profile_success(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
+    async def test_update_device_profile_success(self, async_client, json_headers, created_profile):
         """Test updating an existing device profile."""
-        # Create a profile first
-        create_response = client.post(
-            "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
-        )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
-        etag = create_response.headers["ETag"]
-        
         # Update the profile
         update_data = {
             "name": "Updated Profile Name",
@@ -102,88 +98,59 @@ class TestDeviceProfileCRUD:
             "window_height": 1440
         }
         
-        response = client.patch(
-            f"/api/v1/device-profiles/{profile_id}",
-            json=update_data,
-            headers={**authenticated_headers, "If-Match": etag}
+        response = await async_client.patch(
+            f"/api/v1/device-profiles/{created_profile.id}",
+            content=orjson.dumps(update_data),
+            headers={**json_headers, "If-Match": created_profile.etag}
         )
         
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
+        data = loads(response)
         
         assert data["name"] == update_data["name"]
         assert data["window_width"] == update_data["window_width"]
         assert data["window_height"] == update_data["window_height"]
         assert data["version"] == 2  # Version should increment
-        assert "ETag" in response.headers
-        assert response.headers["ETag"] == 'W/"2"'
+        assert_etag(response, 2)
 
-    def test_delete_device_profile_success(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
+    async def test_delete_device_profile_success(self, async_client, authenticated_headers, created_profile):
         """Test soft deleting a device profile."""
-        # Create a profile first
-        create_response = client.post(
-            "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
-        )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
-        
         # Delete the profile
-        response = client.delete(
-            f"/api/v1/device-profiles/{profile_id}",
+        response = await async_client.delete(
+            f"/api/v1/device-profiles/{created_profile.id}",
             headers=authenticated_headers
         )
         
         assert response.status_code == status.HTTP_204_NO_CONTENT
         
         # Verify profile is soft deleted (not in list)
-        list_response = client.get(
+        list_response = await async_client.get(
             "/api/v1/device-profiles",
             headers=authenticated_headers
         )
         assert list_response.status_code == status.HTTP_200_OK
-        profiles = list_response.json()["items"]
+        profiles = loads(list_response)["items"]
         assert len(profiles) == 0
 
-    def test_list_device_profiles_pagination(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
+    async def test_list_device_profiles_pagination(self, async_client, authenticated_headers, sample_device_profile_data, db_session, test_user):
         """Test paginated listing of device profiles."""
-        import uuid
         # Create multiple profiles with unique names
-        for i in range(3):
-            profile_data = {
-                "name": f"Profile {i+1} {uuid.uuid4().hex[:8]}",
-                "device_type": "desktop",
-                "window_width": 1920,
-                "window_height": 1080,
-                "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "country": "us",
-                "custom_headers": [{"name": "Accept-Language", "value": "en-US,en;q=0.9"}],
-                "extras": {}
-            }
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            assert response.status_code == status.HTTP_201_CREATED
+        seed_profiles(db_session, test_user.id, [
+            {**sample_device_profile_data, "name": f"Profile {next(_profile_name_seq)}"}
+            for _ in range(3)
+        ])
         
         # List profiles
-        response = client.get(
+        response = await async_client.get(
             "/api/v1/device-profiles",
             headers=authenticated_headers
         )
         
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
+        data = loads(response)
         
         # Verify pagination structure
-        assert "items" in data
-        assert "total" in data
-        assert "page" in data
-        assert "size" in data
-        assert "pages" in data
+        assert {"items", "total", "page", "size", "pages"} <= data.keys()
         
         assert len(data["items"]) == 3
         assert data["total"] == 3
@@ -191,286 +158,162 @@ class TestDeviceProfileCRUD:
         assert data["size"] == 50  # Default page size
         
         # Verify profile data
-        for profile in data["items"]:
-            assert "id" in profile
-            assert "name" in profile
-            assert "device_type" in profile
-            assert "version" in profile
+        assert all({"id", "name", "device_type", "version"} <= profile.keys() for profile in data["items"])
 
-    def test_create_profile_duplicate_name(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
+    async def test_create_profile_duplicate_name(self, async_client, json_headers, created_profile):
         """Test creating a profile with duplicate name fails."""
-        # Create first profile
-        response = client.post(
-            "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
-        )
-        assert response.status_code == status.HTTP_201_CREATED
-        
-        # Try to create second profile with same name
-        response = client.post(
+        # Try to create a second profile with the seeded profile's name
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
+            content=orjson.dumps(created_profile.data),
+            headers=json_headers
         )
         
         assert response.status_code == status.HTTP_409_CONFLICT
-        assert "already exists" in response.json()["detail"]
+        assert "already exists" in loads(response)["detail"]
 
-    def test_update_profile_version_mismatch(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
+    async def test_update_profile_version_mismatch(self, async_client, json_headers, created_profile):
         """Test updating a profile with wrong version fails."""
-        # Create a profile first
-        create_response = client.post(
-            "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
-        )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
-        
         # Try to update with wrong version
         update_data = {"name": "Updated Name"}
         
-        response = client.patch(
-            f"/api/v1/device-profiles/{profile_id}",
-            json=update_data,
-            headers={**authenticated_headers, "If-Match": 'W/"999"'}  # Wrong version
+        response = await async_client.patch(
+            f"/api/v1/device-profiles/{created_profile.id}",
+            content=orjson.dumps(update_data),
+            headers={**json_headers, "If-Match": 'W/"999"'}  # Wrong version
         )
         
         assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
-        assert "Version mismatch" in response.json()["detail"]
+        assert "Version mismatch" in loads(response)["detail"]
 
-    def test_update_profile_missing_if_match(self, client, authenticated_headers, sample_device_profile_data, db_session, test_user):
+    async def test_update_profile_missing_if_match(self, async_client, json_headers, created_profile):
         """Test updating a profile without If-Match header fails."""
-        # Create a profile first
-        create_response = client.post(
-            "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
-        )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
-        
         # Try to update without If-Match header
         update_data = {"name": "Updated Name"}
         
-        response = client.patch(
-            f"/api/v1/device-profiles/{profile_id}",
-            json=update_data,
-            headers=authenticated_headers
+        response = await async_client.patch(
+            f"/api/v1/device-profiles/{created_profile.id}",
+            content=orjson.dumps(update_data),
+            headers=json_headers
         )
         
         assert response.status_code == status.HTTP_428_PRECONDITION_REQUIRED
-        assert "If-Match header required" in response.json()["detail"]
+        assert "If-Match header required" in loads(response)["detail"]
 
-    def test_authentication_required_on_all_endpoints(self, client, test_api_key, sample_device_profile_data, db_session, test_user):
-        """Test that authentication is required on all device profile endpoints."""
-        from app.models.device_profile import DeviceProfile
-        from app.schemas.device_profile import DeviceType
-        
-        _, raw_key = test_api_key
-        headers = {"Authorization": f"Bearer {raw_key}"}
-        
-        # Create a profile first
-        create_response = client.post(
+    @pytest.mark.parametrize("content_type,body,error_type", [
+        ("application/json", b"", "missing"),
+        ("application/json", b'{"name": "Malformed', "json_invalid"),
+        ("text/plain", BASE_PROFILE_BODY, "model_attributes_type"),
+    ])
+    async def test_create_device_profile_unparseable_body(self, async_client, authenticated_headers, content_type, body, error_type):
+        """Test that empty, malformed and non-JSON bodies are rejected without echoing the body."""
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=headers
+            content=body,
+            headers={**authenticated_headers, "Content-Type": content_type}
         )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
-        
-        # Test GET /device-profiles (list) without authentication
-        response = client.get("/api/v1/device-profiles")
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
-        
-        # Test GET /device-profiles/{id} without authentication
-        response = client.get(f"/api/v1/device-profiles/{profile_id}")
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
-        
-        # Test PATCH /device-profiles/{id} without authentication
-        response = client.patch(
-            f"/api/v1/device-profiles/{profile_id}",
-            json={"name": "Updated Profile"}
-        )
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
-        
-        # Test DELETE /device-profiles/{id} without authentication
-        response = client.delete(f"/api/v1/device-profiles/{profile_id}")
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
-    def test_cannot_access_other_users_profile(self, client, db_session, test_user, sample_device_profile_data, authenticated_headers):
-        """Test that users cannot access other users' profiles (404, not 403)."""
-        from app.models.user import User
-        from app.models.api_key import APIKey
-        import hashlib
-        from app.settings import settings
-        
-        # Create another user
-        other_user = User(email="other@example.com")
-        db_session.add(other_user)
-        db_session.commit()
-        db_session.refresh(other_user)
-        
-        # Create API key for other user
-        raw_key = "other-user-key-12345"
-        key_hash = hashlib.sha256(f"{raw_key}{settings.api_key_pepper}".encode()).hexdigest()
-        other_api_key = APIKey(owner_id=other_user.id, key_hash=key_hash)
-        db_session.add(other_api_key)
-        db_session.commit()
-        
-        # Create profile for test_user using authenticated headers
-        create_response = client.post(
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        [error] = loads(response)["errors"]
+        assert error["type"] == error_type
+        assert error["loc"] == ["body"]
+        assert error["input"] in (None, {})
+
+    @pytest.mark.parametrize("content_type", ["application/json; charset=utf-8", "application/merge-patch+json"])
+    async def test_create_device_profile_json_content_types(self, async_client, authenticated_headers, content_type):
+        """Test that JSON media types with parameters or a +json suffix are accepted."""
+        profile_data = {**BASE_PROFILE, "name": f"Content Type Profile {next(_profile_name_seq)}"}
+
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=sample_device_profile_data,
-            headers=authenticated_headers
+            content=orjson.dumps(profile_data),
+            headers={**authenticated_headers, "Content-Type": content_type}
         )
-        assert create_response.status_code == status.HTTP_201_CREATED
-        profile_id = create_response.json()["id"]
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    @pytest.mark.parametrize("country", ["us", "gb", "fr", "de", "ca", "au", "jp"])
+    async def test_country_validation_valid(self, async_client, json_headers, country):
+        """Test that valid ISO country codes are accepted."""
+        profile_data = {**BASE_PROFILE, "country": country, "name": f"Test Profile {country.upper()}"}
         
-        # Try to access with other user's credentials
-        response = client.get(
-            f"/api/v1/device-profiles/{profile_id}",
-            headers={"Authorization": f"Bearer {raw_key}"}
+        response = await async_client.post(
+            "/api/v1/device-profiles",
+            content=orjson.dumps(profile_data),
+            headers=json_headers
         )
         
-        # Should return 404 (not 403) for other users' resources
-        assert response.status_code == status.HTTP_404_NOT_FOUND
-        assert "not found" in response.json()["detail"].lower()
+        assert response.status_code == status.HTTP_201_CREATED
+        assert loads(response)["country"] == country
 
-    def test_country_validation(self, client, authenticated_headers, sample_device_profile_data):
+    # Invalid country codes (must be 2 characters due to max_length=2)
+    @pytest.mark.parametrize("country", ["xx", "zz", "12", "ab"])
+    async def test_country_validation_invalid(self, async_client, json_headers, country):
         """Test country code validation using pycountry library."""
-        import uuid
-        
-        # Test valid country codes
-        valid_countries = ["us", "gb", "fr", "de", "ca", "au", "jp"]
-        
-        for i, country in enumerate(valid_countries):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["country"] = country
-            profile_data["name"] = f"Test Profile {country.upper()} {i}"  # Unique name
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_201_CREATED
-            assert response.json()["country"] == country
+        profile_data = {**BASE_PROFILE, "country": country, "name": f"Invalid Profile {country}"}
         
-        # Test invalid country codes (must be 2 characters due to max_length=2)
-        invalid_countries = ["xx", "zz", "12", "ab"]
+        response = await async_client.post(
+            "/api/v1/device-profiles",
+            content=orjson.dumps(profile_data),
+            headers=json_headers
+        )
         
-        for i, country in enumerate(invalid_countries):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["country"] = country
-            profile_data["name"] = f"Invalid Profile {i}"  # Unique name
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-            error_data = response.json()
-            assert "errors" in error_data
-            assert isinstance(error_data["errors"], list)
-            assert len(error_data["errors"]) > 0
-            # Check that the error is related to country validation
-            country_errors = [err for err in error_data["errors"] if "country" in str(err.get("loc", []))]
-            assert len(country_errors) > 0
-
-    def test_window_size_validation(self, client, authenticated_headers, sample_device_profile_data):
-        """Test window size validation (100-10000 range and mobile restrictions)."""
-        # Test valid window sizes
-        valid_sizes = [
-            (100, 100),      # Minimum
-            (1920, 1080),    # Common desktop
-            (375, 667),      # Common mobile
-            (10000, 10000)   # Maximum
-        ]
+        assert_validation_error_on(response, "country")
+
+    @pytest.mark.parametrize("width,height", [
+        (100, 100),      # Minimum
+        (1920, 1080),    # Common desktop
+        (375, 667),      # Common mobile
+        (10000, 10000)   # Maximum
+    ])
+    async def test_window_size_validation_valid(self, async_client, json_headers, width, height):
+        """Test that window sizes within the 100-10000 range are accepted."""
+        profile_data = {
+            **BASE_PROFILE,
+            "window_width": width,
+            "window_height": height,
+            "name": f"Valid Size {width}x{height}",
+        }
         
-        for i, (width, height) in enumerate(valid_sizes):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["window_width"] = width
-            profile_data["window_height"] = height
-            profile_data["name"] = f"Valid Size {i}"
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_201_CREATED
-            assert response.json()["window_width"] == width
-            assert response.json()["window_height"] == height
-        
-        # Test invalid window sizes (too small)
-        invalid_sizes = [
-            (99, 100, ["window_width"]),       # Width too small
-            (100, 99, ["window_height"]),      # Height too small
-            (50, 50, ["window_width", "window_height"]),  # Both too small
-        ]
+        response = await async_client.post(
+            "/api/v1/device-profiles",
+            content=orjson.dumps(profile_data),
+            headers=json_headers
+        )
         
-        for i, (width, height, expected_invalid_fields) in enumerate(invalid_sizes):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["window_width"] = width
-            profile_data["window_height"] = height
-            profile_data["name"] = f"Invalid Small {i}"
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-            error_data = response.json()
-            assert "errors" in error_data
-            assert isinstance(error_data["errors"], list)
-            assert len(error_data["errors"]) > 0
-            
-            # Check that the expected fields have validation errors
-            error_fields = [str(err.get("loc", [])) for err in error_data["errors"]]
-            for expected_field in expected_invalid_fields:
-                assert any(expected_field in field for field in error_fields), \
-                    f"Expected {expected_field} to have validation error, but errors were: {error_fields}"
-        
-        # Test invalid window sizes (too large)
-        invalid_large_sizes = [
-            (10001, 1000, ["window_width"]),   # Width too large
-            (1000, 10001, ["window_height"]),  # Height too large
-            (20000, 20000, ["window_width", "window_height"]),  # Both too large
-        ]
+        assert response.status_code == status.HTTP_201_CREATED
+        assert loads(response)["window_width"] == width
+        assert loads(response)["window_height"] == height
+
+    @pytest.mark.parametrize("width,height,expected_invalid_fields", [
+        # Too small
+        (99, 100, ["window_width"]),
+        (100, 99, ["window_height"]),
+        (50, 50, ["window_width", "window_height"]),
+        # Too large
+        (10001, 1000, ["window_width"]),
+        (1000, 10001, ["window_height"]),
+        (20000, 20000, ["window_width", "window_height"]),
+    ])
+    async def test_window_size_validation_out_of_range(self, async_client, json_headers, width, height, expected_invalid_fields):
+        """Test that window sizes outside the 100-10000 range are rejected."""
+        profile_data = {
+            **BASE_PROFILE,
+            "window_width": width,
+            "window_height": height,
+            "name": f"Invalid Size {width}x{height}",
+        }
         
-        for i, (width, height, expected_invalid_fields) in enumerate(invalid_large_sizes):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["window_width"] = width
-            profile_data["window_height"] = height
-            profile_data["name"] = f"Invalid Large {i}"
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-            error_data = response.json()
-            assert "errors" in error_data
-            assert isinstance(error_data["errors"], list)
-            assert len(error_data["errors"]) > 0
-            
-            # Check that the expected fields have validation errors
-            error_fields = [str(err.get("loc", [])) for err in error_data["errors"]]
-            for expected_field in expected_invalid_fields:
-                assert any(expected_field in field for field in error_fields), \
-                    f"Expected {expected_field} to have validation error, but errors were: {error_fields}"
+        response = await async_client.post(
+            "/api/v1/device-profiles",
+            content=orjson.dumps(profile_data),
+            headers=json_headers
+        )
         
-        # Test mobile ultra-wide restriction
+        assert_validation_error_on(response, *expected_invalid_fields)
+
+    async def test_window_size_validation_mobile_ultra_wide(self, async_client, json_headers):
+        """Test that mobile profiles reject ultra-wide windows."""
         mobile_ultra_wide = {
             "name": "Mobile Ultra Wide",
             "device_type": "mobile",
@@ -482,26 +325,19 @@ class TestDeviceProfileCRUD:
             "extras": {}
         }
         
-        response = client.post(
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=mobile_ultra_wide,
-            headers=authenticated_headers
+            content=orjson.dumps(mobile_ultra_wide),
+            headers=json_headers
         )
         
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-        error_data = response.json()
-        assert "errors" in error_data
-        assert isinstance(error_data["errors"], list)
-        assert len(error_data["errors"]) > 0
-        
-        # Check that the error is related to window width validation for mobile devices
-        error_fields = [str(err.get("loc", [])) for err in error_data["errors"]]
-        # The mobile ultra-wide validation should trigger a validation error
-        # We expect either window_width or a general validation error
-        has_window_error = any("window_width" in field for field in error_fields)
-        has_validation_error = any("__root__" in field or "body" in field for field in error_fields)
-        assert has_window_error or has_validation_error, \
-            f"Expected window_width or validation error for mobile ultra-wide, but errors were: {error_fields}"
+        # The mobile ultra-wide validation runs on the whole model, so the
+        # error is reported either on window_width or on the body itself
+        assert_validation_error_on(response)
+        error_data = loads(response)
+        error_locs = [err.get("loc", ()) for err in error_data["errors"]]
+        assert any("window_width" in loc or loc == ["body"] for loc in error_locs), \
+            f"Expected window_width or validation error for mobile ultra-wide, but errors were: {error_locs}"
         
         # Additional test: Verify specific error types and constraint information
         for error in error_data["errors"]:
@@ -523,9 +359,8 @@ class TestDeviceProfileCRUD:
                 assert "le" in error_ctx, "Range validation should include constraint information"
                 assert error_ctx["le"] == 10000, "Maximum window size should be 10000"
 
-    def test_custom_headers_validation(self, client, authenticated_headers, sample_device_profile_data):
-        """Test custom headers validation (forbidden headers and format)."""
-        # Test valid custom headers
+    async def test_custom_headers_validation(self, async_client, json_headers):
+        """Test that regular custom headers are accepted."""
         valid_headers = [
             {"name": "X-Custom-Header", "value": "test-value"},
             {"name": "User-Agent-Override", "value": "Custom Agent"},
@@ -533,76 +368,49 @@ class TestDeviceProfileCRUD:
             {"name": "Accept-Language", "value": "en-US,en;q=0.9"},
         ]
         
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = valid_headers
-        profile_data["name"] = "Valid Headers Profile"
+        profile_data = {**BASE_PROFILE, "custom_headers": valid_headers, "name": "Valid Headers Profile"}
         
-        response = client.post(
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=profile_data,
-            headers=authenticated_headers
+            content=orjson.dumps(profile_data),
+            headers=json_headers
         )
         
         assert response.status_code == status.HTTP_201_CREATED
-        assert len(response.json()["custom_headers"]) == 4
-        
-        # Test forbidden hop-by-hop headers
-        forbidden_hop_by_hop = [
-            {"name": "Connection", "value": "close"},
-            {"name": "Keep-Alive", "value": "timeout=5"},
-            {"name": "Transfer-Encoding", "value": "chunked"},
-            {"name": "Upgrade", "value": "websocket"},
-        ]
-        
-        for i, header in enumerate(forbidden_hop_by_hop):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["custom_headers"] = [header]
-            profile_data["name"] = f"Forbidden Hop {i}"
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-            error_data = response.json()
-            assert "errors" in error_data
-            assert isinstance(error_data["errors"], list)
-            assert len(error_data["errors"]) > 0
-            # Check that the error is related to custom headers validation
-            header_errors = [err for err in error_data["errors"] if "custom_headers" in str(err.get("loc", []))]
-            assert len(header_errors) > 0
-        
-        # Test forbidden controlled headers
-        forbidden_controlled = [
-            {"name": "Host", "value": "malicious.com"},
-            {"name": "Content-Length", "value": "100"},
-            {"name": "Content-Type", "value": "application/json"},
-            {"name": "Content-Encoding", "value": "gzip"},
-        ]
+        assert len(loads(response)["custom_headers"]) == 4
+
+    @pytest.mark.parametrize("header", [
+        # Hop-by-hop headers
+        {"name": "Connection", "value": "close"},
+        {"name": "Keep-Alive", "value": "timeout=5"},
+        {"name": "Transfer-Encoding", "value": "chunked"},
+        {"name": "Upgrade", "value": "websocket"},
+        # Headers controlled by the client
+        {"name": "Host", "value": "malicious.com"},
+        {"name": "Content-Length", "value": "100"},
+        {"name": "Content-Type", "value": "application/json"},
+        {"name": "Content-Encoding", "value": "gzip"},
+        # Matching is case-insensitive
+        {"name": "CONNECTION", "value": "close"},
+        # Empty name (Pydantic field validation catches this first)
+        {"name": "", "value": "test"},
+        # Whitespace-only name (our custom validator catches this)
+        {"name": "   ", "value": "test"},
+    ], ids=lambda header: repr(header["name"]))
+    async def test_custom_headers_validation_rejected(self, async_client, json_headers, header):
+        """Test that forbidden or malformed custom headers are rejected."""
+        profile_data = {**BASE_PROFILE, "custom_headers": [header], "name": "Rejected Header Profile"}
+        
+        response = await async_client.post(
+            "/api/v1/device-profiles",
+            content=orjson.dumps(profile_data),
+            headers=json_headers
+        )
         
-        for i, header in enumerate(forbidden_controlled):
-            profile_data = sample_device_profile_data.copy()
-            profile_data["custom_headers"] = [header]
-            profile_data["name"] = f"Forbidden Controlled {i}"
-            
-            response = client.post(
-                "/api/v1/device-profiles",
-                json=profile_data,
-                headers=authenticated_headers
-            )
-            
-            assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-            error_data = response.json()
-            assert "errors" in error_data
-            assert isinstance(error_data["errors"], list)
-            assert len(error_data["errors"]) > 0
-            # Check that the error is related to custom headers validation
-            header_errors = [err for err in error_data["errors"] if "custom_headers" in str(err.get("loc", []))]
-            assert len(header_errors) > 0
-        
-        # Test allowed headers
+        assert_validation_error_on(response, "custom_headers")
+
+    async def test_custom_headers_security_headers_allowed(self, async_client, json_headers):
+        """Test that security-related headers are allowed."""
         security_headers = [
             {"name": "Authorization", "value": "Bearer token"},
             {"name": "Cookie", "value": "session=abc123"},
@@ -610,18 +418,16 @@ class TestDeviceProfileCRUD:
             {"name": "WWW-Authenticate", "value": "Basic"},
         ]
         
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = security_headers
-        profile_data["name"] = "Security Headers Profile"
+        profile_data = {**BASE_PROFILE, "custom_headers": security_headers, "name": "Security Headers Profile"}
         
-        response = client.post(
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=profile_data,
-            headers=authenticated_headers
+            content=orjson.dumps(profile_data),
+            headers=json_headers
         )
         
         assert response.status_code == status.HTTP_201_CREATED
-        response_data = response.json()
+        response_data = loads(response)
         assert len(response_data["custom_headers"]) == 4
         
         # Verify the security headers are preserved correctly
@@ -630,114 +436,123 @@ class TestDeviceProfileCRUD:
         assert "Cookie" in header_names
         assert "Set-Cookie" in header_names
         assert "WWW-Authenticate" in header_names
+
+    @given(headers=st.lists(CUSTOM_HEADERS, max_size=5))
+    @example(headers=[
+        {"name": "X-First", "value": "first"},
+        {"name": "X-Second", "value": "second"},
+        {"name": "X-Third", "value": "third"},
+    ])
+    @example(headers=[
+        {"name": "X-Duplicate", "value": "first"},
+        {"name": "X-Duplicate", "value": "second"},
+        {"name": "X-Duplicate", "value": "third"},
+    ])
+    @settings(
+        max_examples=10,
+        deadline=None,
+        derandomize=True,
+        database=None,
+        suppress_health_check=[HealthCheck.function_scoped_fixture],
+    )
+    async def test_custom_headers_preserve_order_and_duplicates(self, async_client, json_headers, headers):
+        """Test that custom headers preserve order and allow duplicates."""
+        profile_data = {**BASE_PROFILE, "custom_headers": headers, "name": f"Header Test Profile {next(_profile_name_seq)}"}
         
-        # Test case sensitivity (should be case-insensitive)
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = [{"name": "CONNECTION", "value": "close"}]
-        profile_data["name"] = "Case Insensitive Test"
-        
-        response = client.post(
+        response = await async_client.post(
             "/api/v1/device-profiles",
-            json=profile_data,
-            headers=authenticated_headers
+            content=orjson.dumps(profile_data),
+            headers=json_headers
         )
         
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-        error_data = response.json()
-        assert "errors" in error_data
-        assert isinstance(error_data["errors"], list)
-        assert len(error_data["errors"]) > 0
-        # Check that the error is related to custom headers validation
-        header_errors = [err for err in error_data["errors"] if "custom_headers" in str(err.get("loc", []))]
-        assert len(header_errors) > 0
-        
-        # Test empty header name (Pydantic field validation catches this first)
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = [{"name": "", "value": "test"}]
-        profile_data["name"] = "Empty Header Name"
-        
-        response = client.post(
-            "/api/v1/device-profiles",
-            json=profile_data,
-            headers=authenticated_headers
-        )
-        
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-        error_data = response.json()
-        assert "errors" in error_data
-        assert isinstance(error_data["errors"], list)
-        assert len(error_data["errors"]) > 0
-        # Check that the error is related to custom headers validation
-        header_errors = [err for err in error_data["errors"] if "custom_headers" in str(err.get("loc", []))]
-        assert len(header_errors) > 0
-        
-        # Test whitespace-only header name (our custom validator catches this)
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = [{"name": "   ", "value": "test"}]
-        profile_data["name"] = "Whitespace Header Name"
-        
-        response = client.post(
-            "/api/v1/device-profiles",
-            json=profile_data,
+        assert response.status_code == status.HTTP_201_CREATED
+        response_headers = loads(response)["custom_headers"]
+        assert [(h["name"], h["value"]) for h in response_headers] == [(h["name"], h["value"]) for h in headers]
+
+
+@pytest.fixture(scope="class")
+def existing_profile(connection, test_user):
+    """
+    Seed one device profile shared by every test in a class.
+    
+    The profile lives in a class-wide SAVEPOINT that the per-test SAVEPOINTs
+    nest inside, so it is only created once and rolled back after the class.
+    Only read-only tests may use it.
+    """
+    nested = connection.begin_nested()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    
+    try:
+        [profile_id] = seed_profiles(session, test_user.id, [BASE_PROFILE])
+        yield SimpleNamespace(id=str(profile_id), etag='W/"1"', data=BASE_PROFILE)
+    finally:
+        session.close()
+        nested.rollback()
+
+
+class TestDeviceProfileReadAccess:
+    """Test read access and authorization against a shared, unmodified profile."""
+
+    async def test_get_device_profile_success(self, async_client, authenticated_headers, existing_profile):
+        """Test retrieving an existing device profile."""
+        # Get the profile
+        response = await async_client.get(
+            f"/api/v1/device-profiles/{existing_profile.id}",
             headers=authenticated_headers
         )
         
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
-        error_data = response.json()
-        assert "errors" in error_data
-        assert isinstance(error_data["errors"], list)
-        assert len(error_data["errors"]) > 0
-        # Check that the error is related to custom headers validation
-        header_errors = [err for err in error_data["errors"] if "custom_headers" in str(err.get("loc", []))]
-        assert len(header_errors) > 0
-
-    def test_custom_headers_preserve_order_and_duplicates(self, client, authenticated_headers, sample_device_profile_data):
-        """Test that custom headers preserve order and allow duplicates."""
-        # Test order preservation
-        ordered_headers = [
-            {"name": "X-First", "value": "first"},
-            {"name": "X-Second", "value": "second"},
-            {"name": "X-Third", "value": "third"},
-        ]
-        
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = ordered_headers
-        profile_data["name"] = "Order Test Profile"
+        assert response.status_code == status.HTTP_200_OK
+        data = loads(response)
         
-        response = client.post(
-            "/api/v1/device-profiles",
-            json=profile_data,
-            headers=authenticated_headers
+        assert data["id"] == existing_profile.id
+        assert data["name"] == existing_profile.data["name"]
+        assert_etag(response, 1)
+
+    @pytest.mark.parametrize("if_none_match", ['W/"1"', '"1"', '*', 'W/"0", W/"1"'])
+    async def test_get_profile_if_none_match_returns_304(self, async_client, authenticated_headers, existing_profile, if_none_match):
+        """Test that a conditional GET matching the current ETag is answered with 304."""
+        response = await async_client.get(
+            f"/api/v1/device-profiles/{existing_profile.id}",
+            headers={**authenticated_headers, "If-None-Match": if_none_match}
         )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert_etag(response, 1)
+
+    @pytest.mark.parametrize("if_none_match", ['W/"0"', '"2"', 'W/"0", W/"2"'])
+    async def test_get_profile_stale_if_none_match_returns_200(self, async_client, authenticated_headers, existing_profile, if_none_match):
+        """Test that a conditional GET with outdated ETags returns the full profile."""
+        response = await async_client.get(
+            f"/api/v1/device-profiles/{existing_profile.id}",
+            headers={**authenticated_headers, "If-None-Match": if_none_match}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert loads(response)["id"] == existing_profile.id
+        assert_etag(response, 1)
+
+    @pytest.mark.parametrize("method,path,body", [
+        ("GET", "/api/v1/device-profiles", None),
+        ("GET", "/api/v1/device-profiles/{id}", None),
+        ("PATCH", "/api/v1/device-profiles/{id}", {"name": "Updated Profile"}),
+        ("DELETE", "/api/v1/device-profiles/{id}", None),
+    ])
+    async def test_authentication_required_on_all_endpoints(self, async_client, existing_profile, method, path, body):
+        """Test that authentication is required on all device profile endpoints."""
+        response = await async_client.request(method, path.format(id=existing_profile.id), json=body)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_cannot_access_other_users_profile(self, async_client, existing_profile, other_api_key):
+        """Test that users cannot access other users' profiles (404, not 403)."""
+        _, raw_key = other_api_key
         
-        assert response.status_code == status.HTTP_201_CREATED
-        response_headers = response.json()["custom_headers"]
-        assert len(response_headers) == 3
-        assert response_headers[0]["name"] == "X-First"
-        assert response_headers[1]["name"] == "X-Second"
-        assert response_headers[2]["name"] == "X-Third"
-        
-        # Test duplicate headers (should be allowed)
-        duplicate_headers = [
-            {"name": "X-Duplicate", "value": "first"},
-            {"name": "X-Duplicate", "value": "second"},
-            {"name": "X-Duplicate", "value": "third"},
-        ]
-        
-        profile_data = sample_device_profile_data.copy()
-        profile_data["custom_headers"] = duplicate_headers
-        profile_data["name"] = "Duplicate Test Profile"
-        
-        response = client.post(
-            "/api/v1/device-profiles",
-            json=profile_data,
-            headers=authenticated_headers
+        # Try to access with other user's credentials
+        response = await async_client.get(
+            f"/api/v1/device-profiles/{existing_profile.id}",
+            headers={"Authorization": f"Bearer {raw_key}"}
         )
         
-        assert response.status_code == status.HTTP_201_CREATED
-        response_headers = response.json()["custom_headers"]
-        assert len(response_headers) == 3
-        assert all(header["name"] == "X-Duplicate" for header in response_headers)
-        assert response_headers[0]["value"] == "first"
-        assert response_headers[1]["value"] == "second"
-        assert response_headers[2]["value"] == "third"
+        # Should return 404 (not 403) for other users' resources
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert loads(response)["detail"] == "Device profile not found"
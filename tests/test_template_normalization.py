@@ -4,92 +4,93 @@ Tests for template payload normalization functionality.
 
 import pytest
 from unittest.mock import Mock
+from pydantic import TypeAdapter, ValidationError
 
+from app.schemas.device_profile import DeviceProfileCreate
 from app.utils.template_normalization import TemplateNormalizer
 
+# Validates a whole batch of normalized templates in one pass
+DEVICE_PROFILE_BATCH = TypeAdapter(list[DeviceProfileCreate])
+
+
+@pytest.fixture(scope="module")
+def normalizer():
+    """Share one normalizer across tests that don't extend it."""
+    return TemplateNormalizer()
+
 
 class TestTemplateNormalization:
     """Test template payload normalization."""
     
-    def test_normalize_basic_payload(self):
-        """Test normalizing a basic template payload."""
-        normalizer = TemplateNormalizer()
-        
-        # Test payload
-        payload = {
-            "name": "Chrome Profile",
-            "device_type": "desktop",
-            "user_agent": "Mozilla/5.0...",
-            "country": "us"
-        }
-        
-        # Normalize the payload
-        normalized = normalizer.normalize_payload(payload)
-        
-        # Verify required fields are preserved
-        assert normalized["name"] == "Chrome Profile"
-        assert normalized["device_type"] == "desktop"
-        assert normalized["user_agent"] == "Mozilla/5.0..."
-        assert normalized["country"] == "us"
-        
-        # Verify default fields are added
-        assert normalized["window_width"] == 1920
-        assert normalized["window_height"] == 1080
-        assert normalized["custom_headers"] == []
-        assert normalized["extras"] == {}
-    
-    def test_normalize_missing_required_fields(self):
-        """Test normalizing payload with missing required fields."""
-        normalizer = TemplateNormalizer()
-        
-        # Minimal payload missing required fields
-        payload = {
-            "name": "Minimal Profile"
-        }
-        
-        normalized = normalizer.normalize_payload(payload)
-        
-        # Verify defaults are applied
-        assert normalized["device_type"] == "desktop"
-        assert normalized["user_agent"] == "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        assert normalized["country"] == "us"
-        assert normalized["window_width"] == 1920
-        assert normalized["window_height"] == 1080
-        assert normalized["custom_headers"] == []
-        assert normalized["extras"] == {}
-    
-    def test_normalize_preserves_existing_values(self):
-        """Test that normalization preserves existing valid values."""
-        normalizer = TemplateNormalizer()
-        
-        # Payload with all fields already present
-        payload = {
-            "name": "Complete Profile",
-            "device_type": "mobile",
-            "window_width": 800,
-            "window_height": 600,
-            "user_agent": "Custom Agent",
-            "country": "gb",
-            "custom_headers": [{"name": "X-Custom", "value": "test"}],
-            "extras": {"browser": "safari"}
-        }
-        
-        normalized = normalizer.normalize_payload(payload)
-        
-        # Verify all existing values are preserved
-        assert normalized["name"] == "Complete Profile"
-        assert normalized["device_type"] == "mobile"
-        assert normalized["window_width"] == 800
-        assert normalized["window_height"] == 600
-        assert normalized["user_agent"] == "Custom Agent"
-        assert normalized["country"] == "gb"
-        assert normalized["custom_headers"] == [{"name": "X-Custom", "value": "test"}]
-        assert normalized["extras"] == {"browser": "safari"}
+    @pytest.mark.parametrize(
+        "payload,expected",
+        [
+            pytest.param(
+                {
+                    "name": "Chrome Profile",
+                    "device_type": "desktop",
+                    "user_agent": "Mozilla/5.0...",
+                    "country": "us"
+                },
+                {
+                    "name": "Chrome Profile",
+                    "device_type": "desktop",
+                    "window_width": 1920,
+                    "window_height": 1080,
+                    "user_agent": "Mozilla/5.0...",
+                    "country": "us",
+                    "custom_headers": [],
+                    "extras": {}
+                },
+                id="basic_payload",
+            ),
+            pytest.param(
+                {
+                    "name": "Minimal Profile"
+                },
+                {
+                    "name": "Minimal Profile",
+                    "device_type": "desktop",
+                    "window_width": 1920,
+                    "window_height": 1080,
+                    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                    "country": "us",
+                    "custom_headers": [],
+                    "extras": {}
+                },
+                id="missing_required_fields",
+            ),
+            pytest.param(
+                {
+                    "name": "Complete Profile",
+                    "device_type": "mobile",
+                    "window_width": 800,
+                    "window_height": 600,
+                    "user_agent": "Custom Agent",
+                    "country": "gb",
+                    "custom_headers": [{"name": "X-Custom", "value": "test"}],
+                    "extras": {"browser": "safari"}
+                },
+                {
+                    "name": "Complete Profile",
+                    "device_type": "mobile",
+                    "window_width": 800,
+                    "window_height": 600,
+                    "user_agent": "Custom Agent",
+                    "country": "gb",
+                    "custom_headers": [{"name": "X-Custom", "value": "test"}],
+                    "extras": {"browser": "safari"}
+                },
+                id="preserves_existing_values",
+            ),
+        ],
+    )
+    def test_normalize_payload(self, normalizer, payload, expected):
+        """Test that normalization keeps payload values and fills in missing defaults."""
+        assert normalizer.normalize_payload(payload) == expected
     
-    def test_normalize_does_not_modify_original(self):
+    def test_normalize_does_not_modify_original(self, normalizer):
         """Test that normalization doesn't modify the original payload."""
-        normalizer = TemplateNormalizer()
-        
         original_payload = {
             "name": "Original Profile",
             "device_type": "desktop"
@@ -131,13 +132,8 @@ class TestTemplateNormalization:
         # Verify new default was applied
         assert normalized["new_required_field"] == "default_value"
     
-    def test_template_schema_compatibility_break_detection(self):
+    def test_template_schema_compatibility_break_detection(self, normalizer):
         """Test that detects when device profile schema changes break existing templates."""
-        from app.schemas.device_profile import DeviceProfileCreate
-        from pydantic import ValidationError
-        
-        normalizer = TemplateNormalizer()
-        
         # Create a template with current valid schema (snapshot)
         current_valid_template = {
             "name": "Chrome Desktop",
@@ -155,7 +151,7 @@ class TestTemplateNormalization:
         
         # This should NOT raise ValidationError - template should be valid
         try:
-            DeviceProfileCreate(**normalized)
+            DeviceProfileCreate.model_validate(normalized)
         except ValidationError as e:
             pytest.fail(f"Template schema compatibility broken! Current template is no longer valid: {e}")
         
@@ -169,7 +165,7 @@ class TestTemplateNormalization:
         
         # This should NOT raise ValidationError - normalization should add defaults
         try:
-            DeviceProfileCreate(**normalized_incomplete)
+            DeviceProfileCreate.model_validate(normalized_incomplete)
         except ValidationError as e:
             pytest.fail(f"Template normalization failed to add required defaults: {e}")
         
@@ -189,39 +185,28 @@ class TestTemplateNormalization:
         
         # This SHOULD raise ValidationError - invalid types should be caught
         with pytest.raises(ValidationError) as exc_info:
-            DeviceProfileCreate(**normalized_invalid)
+            DeviceProfileCreate.model_validate(normalized_invalid)
         
         # Verify specific validation errors
         errors = exc_info.value.errors()
-        error_fields = [error['loc'][0] for error in errors]
+        error_fields = {error['loc'][0] for error in errors}
         
         # Should have validation errors for invalid fields
-        assert 'device_type' in error_fields
-        assert 'window_width' in error_fields
-        assert 'window_height' in error_fields
-        assert 'country' in error_fields
-        assert 'custom_headers' in error_fields
-        assert 'extras' in error_fields
+        expected_fields = {'device_type', 'window_width', 'window_height', 'country', 'custom_headers', 'extras'}
+        assert expected_fields <= error_fields, f"Missing validation errors for: {expected_fields - error_fields}"
     
-    def test_real_template_schema_compatibility(self, test_templates):
+    def test_real_template_schema_compatibility(self, normalizer, test_templates):
         """Test that real templates from the database are compatible with current schema."""
-        from app.schemas.device_profile import DeviceProfileCreate
-        from pydantic import ValidationError
+        payloads = [normalizer.normalize_payload(template.data) for template in test_templates]
         
-        normalizer = TemplateNormalizer()
-        
-        # Test each template for schema compatibility
-        for template in test_templates:
-            template_data = template.data
-            
-            # Normalize the template data
-            normalized = normalizer.normalize_payload(template_data)
-            
-            # This should NOT raise ValidationError - real templates should be valid
-            try:
-                DeviceProfileCreate(**normalized)
-            except ValidationError as e:
-                pytest.fail(
-                    f"Real template '{template.name}' (ID: {template.id}) is no longer "
-                    f"compatible with current device profile schema! Error: {e}"
-                )
+        # This should NOT raise ValidationError - real templates should be valid
+        try:
+            DEVICE_PROFILE_BATCH.validate_python(payloads)
+        except ValidationError as e:
+            # Error locations start with the index of the offending template
+            broken = sorted({error["loc"][0] for error in e.errors()})
+            names = ", ".join(f"'{test_templates[i].name}' (ID: {test_templates[i].id})" for i in broken)
+            pytest.fail(
+                f"Real templates {names} are no longer "
+                f"compatible with current device profile schema! Error: {e}"
+            )
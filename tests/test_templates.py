@@ -7,10 +7,17 @@ from fastapi import status
 from sqlalchemy.orm import Session
 from uuid import UUID
 
+from app.models.device_profile import DeviceProfile
 from app.models.template import Template
+from app.schemas.device_profile import DeviceType
 from app.models.user import User
 from app.models.api_key import APIKey
 from app.auth import hash_api_key
+from tests._assertions import assert_location
+from tests.helpers import loads
+
+# Well-formed template ID that is never seeded
+NONEXISTENT_TEMPLATE_ID = "00000000-0000-0000-0000-000000000000"
 
 
 class TestTemplateAPI:
@@ -21,7 +28,7 @@ class TestTemplateAPI:
         response = client.get("/api/v1/templates")
         
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
+        data = loads(response)
         
         # Should have pagination structure
         assert "items" in data
@@ -47,9 +54,9 @@ class TestTemplateAPI:
         response = client.get(f"/api/v1/templates/{test_template.id}")
         
         assert response.status_code == status.HTTP_200_OK
-        data = response.json()
+        data = loads(response)
         
-        assert data["id"] == str(test_template.id)
+        assert UUID(data["id"]) == test_template.id
         assert data["name"] == "Chrome Desktop"
         assert data["description"] == "Latest Chrome on Windows"
         assert data["version"] == "Chrome 120"
@@ -57,11 +64,10 @@ class TestTemplateAPI:
 
     def test_get_template_not_found(self, client):
         """Test getting a non-existent template returns 404."""
-        fake_id = "00000000-0000-0000-0000-000000000000"
-        response = client.get(f"/api/v1/templates/{fake_id}")
+        response = client.get(f"/api/v1/templates/{NONEXISTENT_TEMPLATE_ID}")
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        data = response.json()
+        data = loads(response)
         assert data["detail"] == "Template not found"
 
     def test_create_profile_from_template_success(self, client, test_template, test_api_key):
@@ -81,7 +87,7 @@ class TestTemplateAPI:
         )
         
         assert response.status_code == status.HTTP_201_CREATED
-        data = response.json()
+        data = loads(response)
         
         # Verify profile was created with template data + overrides
         assert data["name"] == "My Custom Profile"  # Override applied
@@ -95,8 +101,7 @@ class TestTemplateAPI:
         assert data["extras"]["browser"] == "chrome"  # From template
         
         # Verify Location header
-        assert "Location" in response.headers
-        assert f"/api/v1/device-profiles/{data['id']}" in response.headers["Location"]
+        assert_location(response, data["id"])
 
     def test_create_profile_from_template_with_full_overrides(self, client, test_template, test_api_key):
         """Test creating a profile from template with full overrides."""
@@ -120,7 +125,7 @@ class TestTemplateAPI:
         )
         
         assert response.status_code == status.HTTP_201_CREATED
-        data = response.json()
+        data = loads(response)
         
         # Verify all overrides were applied
         assert data["name"] == "Fully Custom Profile"
@@ -143,39 +148,33 @@ class TestTemplateAPI:
         """Test creating profile from non-existent template returns 404."""
         _, raw_key = test_api_key
         
-        fake_id = "00000000-0000-0000-0000-000000000000"
         overrides = {"name": "Test Profile"}
         
         response = client.post(
-            f"/api/v1/templates/{fake_id}/create-profile",
+            f"/api/v1/templates/{NONEXISTENT_TEMPLATE_ID}/create-profile",
             json=overrides,
             headers={"Authorization": f"Bearer {raw_key}"}
         )
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
-        data = response.json()
+        data = loads(response)
         assert data["detail"] == "Template not found"
 
     def test_create_profile_from_template_duplicate_name(self, client, test_template, test_api_key, db_session):
         """Test creating profile from template with duplicate name returns 409."""
         _, raw_key = test_api_key
         
-        # Create a profile with the same name first
-        from app.repositories.device_profile import DeviceProfileRepository
-        from app.schemas.device_profile import DeviceProfileCreate
-        
-        profile_repo = DeviceProfileRepository(db_session)
-        existing_profile = DeviceProfileCreate(
+        # Seed a profile with the same name first
+        db_session.add(DeviceProfile(
+            owner_id=test_api_key[0].owner_id,
             name="Chrome Desktop Profile",  # Same name as template
-            device_type="desktop",
+            device_type=DeviceType.DESKTOP,
             window_width=1920,
             window_height=1080,
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             country="us",
-            custom_headers=[],
-            extras={}
-        )
-        profile_repo.create(test_api_key[0].owner_id, existing_profile)
+        ))
+        db_session.flush()
         
         # Try to create another profile with the same name from template
         overrides = {"name": "Chrome Desktop Profile"}
@@ -187,7 +186,7 @@ class TestTemplateAPI:
         )
         
         assert response.status_code == status.HTTP_409_CONFLICT
-        data = response.json()
+        data = loads(response)
         assert "Profile with name 'Chrome Desktop Profile' already exists" in data["detail"]
 
     def test_create_profile_from_template_requires_authentication(self, client, test_template):
@@ -200,5 +199,5 @@ class TestTemplateAPI:
         )
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
-        data = response.json()
+        data = loads(response)
         assert data["detail"] == "API key required"